@@ -1,25 +1,35 @@
 import argparse
-import shutil
 import subprocess
-import os
-import sys
 from src import generator
 from src import config
 from src import visual
-from src.utils import get_default_output_path
+from src import utils
 
 def ensure_stockfish_available():
-    # Verifica se Stockfish está disponível localmente ou instalado no sistema
-    if shutil.which("stockfish") is None and not os.path.isfile("./stockfish"):
+    # Verifica se Stockfish está disponível localmente ou instalado no sistema e retorna o caminho detectado
+    try:
+        engine_path = utils.detect_stockfish_path()
+        visual.print_success("[bold green]Stockfish: Disponível[/bold green]\n")
+    except Exception:
         visual.console.print("[yellow]Stockfish não encontrado. Baixando binário otimizado...[/yellow]")
         try:
             subprocess.run(["bash", "build_stockfish.sh"], check=True)
+            engine_path = utils.detect_stockfish_path()
             visual.print_success("[bold green]Stockfish instalado com sucesso![/bold green]")
-        except subprocess.CalledProcessError as e:
+        except Exception as e:
             visual.print_error(f"Erro ao instalar Stockfish: {e}")
             exit(1)
-    else:
-        visual.print_success("[bold green]Stockfish: Disponível[/bold green]\n")
+    return engine_path
+
+# Tipo do argparse para opções que exigem um inteiro maior que zero
+def positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"valor inteiro inválido: '{value}'")
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"deve ser um inteiro positivo: {number}")
+    return number
 
 def main():
     parser = argparse.ArgumentParser(description="Extrair puzzles táticos de partidas de xadrez em PGN")
@@ -27,23 +37,27 @@ def main():
     parser.add_argument("--output", "-o", help="Arquivo de saída para puzzles (se não especificado, usa <nome_do_pgn>_puzzles.pgn na pasta puzzles/)")
     parser.add_argument("--depth", "-d", type=int, help=f"Profundidade da análise do motor (padrão: {config.DEFAULT_DEPTH})", default=config.DEFAULT_DEPTH)
     parser.add_argument("--max-variants", "-m", type=int, help=f"Máximo de variantes alternativas na solução (padrão: {config.DEFAULT_MAX_VARIANTS})", default=config.DEFAULT_MAX_VARIANTS)
+    parser.add_argument("--workers", "-w", type=positive_int, help=f"Número de processos de análise em paralelo, cada um com seu próprio Stockfish (padrão: {config.DEFAULT_WORKERS})", default=config.DEFAULT_WORKERS)
+    parser.add_argument("--threads", "-t", type=positive_int, help=f"Threads de cada Stockfish (padrão: 1; no modo paralelo, {config.WORKER_ENGINE_THREADS} por processo)", default=None)
+    parser.add_argument("--hash", type=positive_int, help=f"Tabela de transposição de cada Stockfish, em MB (padrão: {config.ENGINE_HASH_MB}; no modo paralelo, até {config.ENGINE_HASH_MB} MB por processo, limitado a {config.ENGINE_HASH_BUDGET_MB} MB no total)", default=None)
     parser.add_argument("--resume", "-r", action="store_true", help="Retomar do último progresso salvo (não reanalisar jogos já processados)")
     parser.add_argument("--verbose", "-v", action="store_true", help="Mostrar saída verbosa (detalhes da análise)")
     args = parser.parse_args()
 
     # Definir caminho de saída padrão se não foi especificado
-    args.output = get_default_output_path(args.input, args.output)
+    args.output = utils.get_default_output_path(args.input, args.output)
 
     # Exibe cabeçalho e configurações usando o módulo visual
     visual.print_main_header()
-    ensure_stockfish_available()
+    engine_path = ensure_stockfish_available()
     visual.print_configurations(args)
 
     try:
         # Chama o gerador de puzzles e obtém o objeto de resultado
         result = generator.generate_puzzles(
             args.input, args.output, depth=args.depth, max_variants=args.max_variants,
-            verbose=args.verbose, resume=args.resume
+            verbose=args.verbose, resume=args.resume, workers=args.workers,
+            engine_path=engine_path, threads=args.threads, hash_mb=args.hash
         )
 
         # Exibe mensagem de sucesso apenas se o processo não foi interrompido
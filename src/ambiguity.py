@@ -1,11 +1,21 @@
 import chess
 import chess.engine
+from collections import OrderedDict
+from itertools import islice, takewhile
 from src import config
+from src import utils
+from src.analysis_cache import cached_analyse
 
-def find_alternatives(engine, board, solver_color, max_variants, depth=None):
+# Vereditos já calculados, indexados pela posição (chave de transposição) e pelos parâmetros da análise.
+# A mesma posição pós-blunder costuma se repetir entre partidas (aberturas populares), e o veredito não muda
+_verdict_cache = OrderedDict()
+
+def find_alternatives(engine, board, solver_color, max_variants, depth=None, game=None, prescreen_depth=None):
     """
     Analisa a posição dada (lado solver_color para jogar) e retorna o melhor lance e alternativas dentro de ALT_THRESHOLD.
-    Retorna {"best": Move, "alternatives": [Move, ...]} ou None se houver mais alternativas do que max_variants permite.
+    Retorna {"best": Move, "alternatives": [Move, ...], "reply": Move ou None, "score": PovScore ou None} ou None se houver
+    mais alternativas do que max_variants permite. "reply" é a resposta do oponente na PV do melhor lance e "score" a
+    avaliação do melhor lance, quando o motor os informa.
     
     Args:
         engine: Motor de xadrez para análise
@@ -13,21 +23,65 @@ def find_alternatives(engine, board, solver_color, max_variants, depth=None):
         solver_color: Cor que deve resolver o puzzle (WHITE ou BLACK)
         max_variants: Número máximo de variantes alternativas permitidas
         depth: Profundidade de análise (usa valor configurado pelo usuário)
+        game: Identificador do jogo analisado (o motor só recebe "ucinewgame" quando ele muda)
+        prescreen_depth: Profundidade de uma triagem barata com multipv=2; se ela já reprovar a unicidade,
+            a análise completa não é feita
     """
     # Se a profundidade não for especificada, usar um valor padrão
     if depth is None:
         depth = config.DEFAULT_DEPTH
-        
+
+    # Lance forçado (único lance legal): a solução é inequívoca e não há o que perguntar ao motor
+    legal_moves = list(islice(board.generate_legal_moves(), 2))
+    if not legal_moves:
+        return None
+    if len(legal_moves) == 1:
+        return {"best": legal_moves[0], "alternatives": [], "reply": None, "score": None}
+
+    # Mesma noção de posição que cached_analyse: chave de transposição e contador de meios-lances
+    key = (board._transposition_key(), board.halfmove_clock, solver_color, max_variants, depth, prescreen_depth)
+    if key in _verdict_cache:
+        _verdict_cache.move_to_end(key)
+        return _verdict_cache[key]
+
+    if prescreen_depth is not None and prescreen_depth < depth and _fails_prescreen(engine, board, solver_color, max_variants, prescreen_depth, game):
+        verdict = None
+    else:
+        info_list = _analyse_multipv(engine, board, max_variants, depth, game)
+        if info_list is None:
+            return None  # Falha do motor: o veredito não é memorizado, para a posição poder ser reanalisada depois
+        verdict = classify_multipv(info_list, solver_color, max_variants)
+    _verdict_cache[key] = verdict
+    if len(_verdict_cache) > config.AMBIGUITY_CACHE_SIZE:
+        _verdict_cache.popitem(last=False)  # Descarta o veredito usado há mais tempo
+    return verdict
+
+def _fails_prescreen(engine, board, solver_color, max_variants, depth, game):
+    # Triagem com apenas 2 PVs: reprova quando o segundo lance não é equivalente ao melhor (fica fora de ALT_THRESHOLD,
+    # ou não há variantes permitidas) e ainda assim está a menos de PUZZLE_UNICITY_THRESHOLD dele.
+    # É o caminho de rejeição mais comum, e custa bem menos que o multipv completo na profundidade de solução
+    try:
+        info_list = cached_analyse(engine, board, depth, multipv=2, game=game)
+    except chess.engine.EngineError:
+        return False
+    if len(info_list) < 2 or info_list[0].get("score") is None or info_list[1].get("score") is None:
+        return False
+    gap = utils.score_to_cp(info_list[0]["score"], solver_color) - utils.score_to_cp(info_list[1]["score"], solver_color)
+    if max_variants > 0 and gap <= config.ALT_THRESHOLD:
+        return False
+    return gap < config.PUZZLE_UNICITY_THRESHOLD
+
+def _analyse_multipv(engine, board, max_variants, depth, game):
+    # Executa a análise multipv de find_alternatives; retorna a lista de InfoDicts ou None se o motor falhar
     # Definir número de PVs a pedir: max_variants+2 para detectar excesso
-    requested_pv = max_variants + 1
     requested_pv_excess = max_variants + 2
     try:
         # Analisar com multipv para obter várias variantes (usando a profundidade informada)
-        info_list = engine.analyse(board, limit=chess.engine.Limit(depth=depth), multipv=requested_pv_excess)
+        info_list = cached_analyse(engine, board, depth, multipv=requested_pv_excess, game=game)
     except chess.engine.EngineError:
         # Fallback: análise single PV se multipv falhar (usando a mesma profundidade)
         try:
-            best = engine.analyse(board, limit=chess.engine.Limit(depth=depth))
+            best = cached_analyse(engine, board, depth, game=game)
             if not best:
                 return None
             info_list = [best]
@@ -37,44 +91,40 @@ def find_alternatives(engine, board, solver_color, max_variants, depth=None):
     # Garantir que info_list seja uma lista
     if isinstance(info_list, dict):
         info_list = [info_list]
+    return info_list
+
+def classify_multipv(info_list, solver_color, max_variants):
+    """
+    Classifica o resultado de uma análise multipv (lista de InfoDicts, do melhor para o pior) sem consultar o motor.
+    Retorna {"best": Move, "alternatives": [Move, ...], "reply": Move ou None, "score": PovScore}, ou None se a posição for ambígua.
+    """
     if not info_list:
         return None
 
-    # Extrair pontuações do ponto de vista de solver_color
-    scores = []
-    for info in info_list:
-        score = info.get("score")
-        if score is None:
-            continue
-        # Converter score para centipawn na perspectiva de solver_color
-        if score.is_mate():
-            mate_plies = score.pov(solver_color).mate()
-            if mate_plies is None:
-                cp_val = 0
-            elif mate_plies > 0:
-                cp_val = -100000  # mate contra o solver (derrota)
-            else:
-                cp_val = 100000   # mate a favor do solver (vitória)
-        else:
-            cp = score.pov(solver_color).score()
-            cp_val = cp if cp is not None else 0
-        scores.append(cp_val)
-    if not scores:
+    # Limiares lidos uma vez, como variáveis locais
+    alt_threshold = config.ALT_THRESHOLD
+    unicity_threshold = config.PUZZLE_UNICITY_THRESHOLD
+
+    # Pares (pontuação do ponto de vista de solver_color, info), na ordem devolvida pelo motor
+    scored = [(utils.score_to_cp(info["score"], solver_color), info) for info in info_list if info.get("score") is not None]
+    if not scored:
         return None
+    scores = [sc for sc, _ in scored]
 
-    # Identificar melhores lances dentro do threshold
+    # Identificar melhores lances dentro do threshold (a lista está ordenada: para no primeiro fora do ALT_THRESHOLD)
     best_score = scores[0]
     candidates_moves = []
-    for idx, sc in enumerate(scores):
-        if best_score - sc <= config.ALT_THRESHOLD:
-            pv_line = info_list[idx].get("pv")
-            if pv_line:
-                move = pv_line[0]
-            else:
-                continue  # ignora caso não haja PV completa
-            candidates_moves.append(move)
-        else:
-            break  # restante já fora do ALT_THRESHOLD (lista está ordenada)
+    reply = None
+    best_line_score = None
+    for sc, info in takewhile(lambda item: best_score - item[0] <= alt_threshold, scored):
+        pv_line = info.get("pv")
+        if not pv_line:
+            continue  # ignora caso não haja PV completa
+        if not candidates_moves:
+            best_line_score = info["score"]  # Avaliação da linha do melhor lance
+            if len(pv_line) > 1:
+                reply = pv_line[1]  # Resposta esperada do oponente na linha do melhor lance
+        candidates_moves.append(pv_line[0])
     # Se número de movimentos equivalentes excede max_variants+1, considerar puzzle ambíguo
     if len(candidates_moves) > max_variants + 1:
         return None
@@ -88,11 +138,11 @@ def find_alternatives(engine, board, solver_color, max_variants, depth=None):
     if max_variants > 0:
         if len(scores) > len(candidates_moves):
             next_score = scores[len(candidates_moves)]
-            if best_score - next_score < config.PUZZLE_UNICITY_THRESHOLD:
+            if best_score - next_score < unicity_threshold:
                 return None
     else:
         # max_variants = 0: exigir que melhor lance seja claramente superior ao segundo melhor
-        if len(scores) >= 2 and (best_score - scores[1] < config.PUZZLE_UNICITY_THRESHOLD):
+        if len(scores) >= 2 and (best_score - scores[1] < unicity_threshold):
             return None
 
-    return {"best": best_move, "alternatives": alt_moves}
+    return {"best": best_move, "alternatives": alt_moves, "reply": reply, "score": best_line_score}
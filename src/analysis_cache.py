@@ -0,0 +1,48 @@
+import chess.engine
+from collections import OrderedDict
+from src import config
+
+# Resultados de análises já feitas neste processo, do mais antigo para o mais recente
+_cache = OrderedDict()
+
+# Campos do InfoDict usados pelo extrator; o resto (nodes, nps, tbhits, hashfull...) não é guardado
+_KEPT_FIELDS = ("score", "pv")
+
+# Lances da PV guardados: o extrator só usa o lance (pv[0]) e a resposta esperada do oponente (pv[1])
+_KEPT_PV_LENGTH = 2
+
+# Um chess.engine.Limit por profundidade, criado uma vez e reaproveitado em todas as análises
+_limits = {}
+
+def _slim(info):
+    # Reduz o InfoDict aos campos usados (e a PV aos lances usados), para o cache ocupar menos memória
+    slim = {field: info[field] for field in _KEPT_FIELDS if field in info}
+    if "pv" in slim:
+        slim["pv"] = slim["pv"][:_KEPT_PV_LENGTH]
+    return slim
+
+def cached_analyse(engine, board, depth, multipv=None, game=None):
+    """
+    Equivalente a engine.analyse(board, Limit(depth=depth), multipv=multipv, game=game), com memorização.
+    A mesma posição é reanalisada várias vezes (aberturas comuns entre partidas, varredura e montagem do puzzle),
+    então o resultado é guardado num LRU indexado pela chave de transposição da posição.
+
+    O resultado devolvido contém apenas "score" e os dois primeiros lances de "pv", é compartilhado entre chamadas
+    e não deve ser modificado.
+    Erros do motor não são memorizados e chegam normalmente ao chamador.
+    """
+    key = (board._transposition_key(), board.halfmove_clock, depth, multipv)
+    info = _cache.get(key)
+    if info is not None:
+        _cache.move_to_end(key)
+        return info
+
+    limit = _limits.get(depth)
+    if limit is None:
+        limit = _limits[depth] = chess.engine.Limit(depth=depth)
+    info = engine.analyse(board, limit=limit, multipv=multipv, game=game)
+    info = [_slim(line) for line in info] if isinstance(info, list) else _slim(info)
+    _cache[key] = info
+    if len(_cache) > config.ANALYSIS_CACHE_SIZE:
+        _cache.popitem(last=False)  # Descarta a análise usada há mais tempo
+    return info
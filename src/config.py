@@ -5,8 +5,23 @@
 DEFAULT_OUTPUT = "puzzles.pgn"     # Arquivo de saída padrão
 DEFAULT_DEPTH = 12                 # Profundidade padrão para análise
 DEFAULT_MAX_VARIANTS = 2           # Número máximo de variantes alternativas
+DEFAULT_WORKERS = 1                # Processos de análise em paralelo (cada um com seu próprio Stockfish)
+RESUME_SAVE_INTERVAL = 25          # Jogos processados entre dois salvamentos do resume (e do arquivo de saída)
+RESUME_SAVE_SECONDS = 60           # Intervalo máximo (s) entre dois salvamentos, para jogos lentos não acumularem progresso perdido
+
+# Opções do Stockfish
+ENGINE_HASH_MB = 128               # Tabela de transposição (MB); o padrão do Stockfish (16 MB) é pequeno para profundidade 18
+ENGINE_HASH_BUDGET_MB = 1024       # Limite total (MB) das tabelas de transposição no modo paralelo (cada motor usa até ENGINE_HASH_MB)
+WORKER_ENGINE_THREADS = 1          # Threads de cada Stockfish no modo paralelo: N motores de 1 thread rendem mais que 1 de N threads
+
+# Caches de análise (por processo)
+ANALYSIS_CACHE_MEMORY_MB = 128     # Memória aproximada do cache de resultados do motor (src/analysis_cache.py), em cada processo
+ANALYSIS_CACHE_ENTRY_BYTES = 1200  # Tamanho médio medido de um resultado memorizado (~1 KB com uma PV, ~3 KB com multipv=4)
+ANALYSIS_CACHE_SIZE = ANALYSIS_CACHE_MEMORY_MB * 1024 * 1024 // ANALYSIS_CACHE_ENTRY_BYTES  # Máximo de resultados memorizados
+AMBIGUITY_CACHE_SIZE = 100000      # Máximo de posições com veredito de ambiguidade memorizado
 
 # Para uma varredura ainda mais rápida com soluções muito profundas
+PRESCAN_DEPTH_MULTIPLIER = 0.375   # 37,5% da profundidade base (pré-varredura de todos os lances; acima de 'quick', que serve de fallback)
 SCAN_DEPTH_MULTIPLIER = 0.5        # 50% da profundidade base
 SOLVE_DEPTH_MULTIPLIER = 1.5       # 150% da profundidade base
 
@@ -14,10 +29,14 @@ SOLVE_DEPTH_MULTIPLIER = 1.5       # 150% da profundidade base
 PUZZLE_UNICITY_THRESHOLD = 150     # Margem mínima para próximo lance pior (1.5 peão)
 BLUNDER_THRESHOLD = 150            # Queda mínima na avaliação para detectar um blunder (1.5 peão)
 ALT_THRESHOLD = 25                 # Diferença máxima (em cp) para considerar lances equivalentes (0.25 peão)
+MIN_PUZZLE_HALF_MOVES = 4          # Comprimento mínimo da linha principal do puzzle (blunder, S1, O1, S2)
+PRESCAN_MARGIN = 100               # Folga abaixo de BLUNDER_THRESHOLD para a pré-varredura pedir confirmação na profundidade 'scan'
+                                   # (quedas a partir de 0.5 peão na pré-varredura rasa são reavaliadas)
 
 # Constantes de valor em peões para avaliações
 WINNING_ADVANTAGE = 150            # Vantagem considerada decisiva (1.5 peão)
 DRAWING_RANGE = 100                # Intervalo para considerar posição como aproximadamente igualada (-1 a +1)
+MATE_SCORE = 100000                # Valor em centipawns atribuído a um mate ao comparar avaliações
 
 def calculate_depths(base_depth):
     """
@@ -30,6 +49,7 @@ def calculate_depths(base_depth):
         dict: Dicionário com as diferentes profundidades calculadas
     """
     depths = {
+        'prescan': max(1, int(base_depth * PRESCAN_DEPTH_MULTIPLIER)),  # Para a pré-varredura de cada lance
         'scan': max(1, int(base_depth * SCAN_DEPTH_MULTIPLIER)),  # Para varredura inicial
         'solve': max(1, int(base_depth * SOLVE_DEPTH_MULTIPLIER)),  # Para análise profunda
         'base': base_depth,  # Mantém a profundidade original
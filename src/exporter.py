@@ -1,10 +1,15 @@
 import chess.pgn
 
-def export_puzzle(puzzle_game, output_file_handle):
+def format_puzzle(puzzle_game):
     """
-    Escreve o puzzle (objeto chess.pgn.Game) no arquivo especificado.
+    Converte o puzzle (objeto chess.pgn.Game) para texto PGN.
     """
     exporter = chess.pgn.StringExporter(headers=True, variations=True, comments=False)
-    pgn_text = puzzle_game.accept(exporter)
+    return puzzle_game.accept(exporter)
+
+def export_puzzle(pgn_text, output_file_handle):
+    """
+    Escreve o texto PGN do puzzle no arquivo especificado.
+    O flush fica a cargo de quem chama, junto com o salvamento do resume.
+    """
     output_file_handle.write(pgn_text + "\n\n")
-    output_file_handle.flush()
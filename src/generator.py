@@ -1,10 +1,11 @@
-import os
-import shutil
+import signal
+import time
+import multiprocessing.util
 import chess
-import chess.engine
 import chess.pgn
-import time
-from collections import defaultdict
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
 from rich.text import Text
 from src import utils
 from src import ambiguity  # Lógica que futuramente migrará para o módulo analyzer
@@ -12,27 +13,377 @@ from src import exporter
 from src import config
 from src import visual
 from src import resume as resume_module
-from src.statistics import PuzzleStatistics, AnalysisResult
+from src.statistics import AnalysisResult
+from src.analysis_cache import cached_analyse
+
+# Motor do processo trabalhador (cada processo do pool mantém o seu próprio Stockfish)
+_worker_engine = None
+
+def detect_blunder(prev_cp, post_cp, turn, margin=0):
+    """
+    Compara as avaliações (em centipawns, ponto de vista das brancas) antes e depois de um lance.
+    turn é o lado a jogar após o lance. Retorna a cor que deve resolver o puzzle se o lance
+    derrubou a avaliação de quem o jogou em pelo menos BLUNDER_THRESHOLD - margin, ou None caso contrário.
+    """
+    threshold = config.BLUNDER_THRESHOLD - margin
+    eval_diff = prev_cp - post_cp
+    if turn == chess.BLACK:  # Brancas jogaram e a avaliação caiu
+        if eval_diff >= threshold:
+            return chess.BLACK  # Pretas devem resolver
+    else:  # Pretas jogaram e a avaliação caiu
+        if eval_diff <= -threshold:
+            return chess.WHITE  # Brancas devem resolver
+    return None
+
+def _evaluate(engine, board, depth, fallback_depth, game):
+    # Avalia a posição na profundidade pedida (ou em fallback_depth, se a análise falhar); retorna (score, cp das brancas)
+    try:
+        info = cached_analyse(engine, board, depth, game=game)
+    except Exception:
+        if fallback_depth >= depth:
+            raise  # Repetir numa profundidade igual ou maior não é um fallback
+        info = cached_analyse(engine, board, fallback_depth, game=game)
+    score = info.get("score")
+    return score, (score.pov(chess.WHITE).score() if score else None)
+
+def analyze_game(engine, game, depths, max_variants, progress, verbose=False):
+    """
+    Analisa um único jogo e gera os puzzles táticos encontrados nele.
+
+    Args:
+        engine: Motor de xadrez para análise
+        game: Jogo (utils.MainlineGame) a ser analisado
+        depths: Profundidades calculadas por config.calculate_depths
+        max_variants: Número máximo de variantes alternativas permitidas
+        progress: Destino das mensagens de log (barra de progresso ou visual.DeferredOutput)
+        verbose: Se True, registra os detalhes da análise
+
+    Returns:
+        tuple: (puzzles, rejections), onde puzzles é uma lista de (pgn_text, objetivo, fase)
+               e rejections é a lista de motivos dos candidatos descartados
+    """
+    puzzles = []
+    rejections = []
+
+    # Todas as análises recebem game=game: o python-chess envia "ucinewgame" apenas quando o jogo muda,
+    # preservando a tabela de transposição entre a varredura e a montagem dos puzzles do mesmo jogo.
+    # Passam também por cached_analyse, que evita repetir a análise de posições já vistas neste processo
+
+    # Headers originais do jogo (somente leitura, por isso não há cópia) e posição inicial
+    original_headers = game.headers
+    board = game.board()
+
+    # Avaliação inicial da posição com a profundidade da pré-varredura
+    try:
+        info = cached_analyse(engine, board, depths['prescan'], game=game)
+    except Exception as e:
+        progress.log(f"[red]Erro ao analisar posição inicial do jogo {original_headers.get('White', '?')} x {original_headers.get('Black', '?')}: {e}[/red]")
+        return puzzles, rejections
+    prev_score = info.get("score")
+    prev_cp = prev_score.pov(chess.WHITE).score() if prev_score else None
+    # Avaliação da posição anterior na profundidade da pré-varredura (a pré-varredura só compara avaliações dessa profundidade)
+    prev_prescan_cp = prev_cp
+    # Texto da avaliação anterior no log verbose; a avaliação pós-lance formatada é reaproveitada no lance seguinte
+    prev_str = None
+
+    # Profundidades e limiares usados a cada lance, lidos uma vez como variáveis locais
+    prescan_depth = depths['prescan']
+    scan_depth = depths['scan']
+    quick_depth = depths['quick']
+    prescan_margin = config.PRESCAN_MARGIN
+    winning_advantage = config.WINNING_ADVANTAGE
+    drawing_range = config.DRAWING_RANGE
+
+    # Itera pelos movimentos da linha principal
+    move_number = 0
+    for move in game.mainline_moves():
+        move_number += 1
+        # Lado que joga e SAN (que exige gerar os lances legais para desambiguação) só são usados no log verbose
+        if verbose:
+            side_to_move = "White" if board.turn == chess.WHITE else "Black"
+            move_san = board.san(move)
+        board.push(move)
+
+        # Nova análise após o lance, primeiro na profundidade rasa da pré-varredura
+        score, post_cp = _evaluate(engine, board, prescan_depth, quick_depth, game)
+        prescan_cp = post_cp
+
+        # O blunder só é decidido com as duas avaliações na profundidade 'scan': quando a pré-varredura já usa essa
+        # profundidade, ou quando ela indica uma queda próxima do limiar (dentro de PRESCAN_MARGIN) e as duas posições
+        # são reavaliadas na profundidade 'scan'
+        scan_evals = prescan_depth >= scan_depth
+        if (not scan_evals and prev_prescan_cp is not None and prescan_cp is not None
+                and detect_blunder(prev_prescan_cp, prescan_cp, board.turn, margin=prescan_margin) is not None):
+            score, post_cp = _evaluate(engine, board, scan_depth, quick_depth, game)
+            board.pop()
+            prev_score, prev_cp = _evaluate(engine, board, scan_depth, quick_depth, game)
+            prev_str = None  # A avaliação anterior mudou: precisa ser formatada de novo
+            board.push(move)
+            scan_evals = True
+
+        # Log detalhado se verbose estiver ativo
+        post_str = None
+        if verbose:
+            if prev_str is None:
+                prev_str = utils.format_eval(prev_score)
+            post_str = utils.format_eval(score)
+            move_index = board.fullmove_number
+            log_prefix = f"{move_index}." if side_to_move == "White" else f"{move_index}..."
+            eval_text = Text()
+            eval_text.append(f"{log_prefix} {move_san}: eval ")
+            eval_text.append(prev_str, style="blue")
+            eval_text.append(" → ")
+            if prev_cp is not None and post_cp is not None:
+                diff = post_cp - prev_cp
+                style = "red" if diff < 0 and abs(diff) > 50 else ("green" if diff > 0 and abs(diff) > 50 else "blue")
+                eval_text.append(post_str, style=style)
+            else:
+                eval_text.append(post_str, style="blue")
+            progress.log(eval_text)
+
+        # Verifica queda de avaliação (potencial blunder) usando as avaliações já obtidas na varredura
+        if scan_evals and prev_cp is not None and post_cp is not None:
+            solver_color = detect_blunder(prev_cp, post_cp, board.turn)
+
+            if solver_color is not None:
+                # Candidato a puzzle detectado
+                if verbose:
+                    diff = abs(post_cp - prev_cp)
+                    diff_pawn = diff / 100.0
+                    side = "Brancas" if solver_color == chess.WHITE else "Pretas"
+                    progress.log(f"[bold yellow]Candidato a puzzle detectado no lance {move_number}[/bold yellow]\n"
+                                 f"{side_to_move} cometeu erro: avaliação {prev_str} → {post_str}\n"
+                                 f"Diferença: {diff_pawn:.2f} peões")
+                puzzle_ok = True
+                reason = None
+
+                # Filtro de vantagem prévia (não instrutivo) removido conforme nova estratégia
+                # Dados da posição anterior ao blunder, lidos desfazendo e refazendo o lance no próprio board
+                board.pop()
+                pre_blunder_fen = board.fen()
+                fullmove_num = board.fullmove_number
+                # Peças no tabuleiro exceto os reis, contadas direto no bitboard de ocupação
+                piece_count = chess.popcount(board.occupied & ~board.kings)
+                board.push(move)
+
+                # Cria o objeto PGN para o puzzle
+                puzzle_game = chess.pgn.Game()
+                # Copiar headers originais
+                puzzle_game.headers.update(original_headers)
+                # Adicionar FEN da posição inicial do puzzle
+                puzzle_game.headers["SetUp"] = "1"
+                puzzle_game.headers["FEN"] = pre_blunder_fen
+
+                # Monta a linha principal e as variações do puzzle
+                node = puzzle_game
+                # Adicionar lance de blunder do adversário como o primeiro lance do puzzle
+                blunder_move = move
+                node = node.add_main_variation(blunder_move)
+                half_moves = 1  # Lances na linha principal do puzzle, contados à medida que são adicionados
+                # Agora, node representa a posição após o blunder, e é a vez do solver jogar
+
+                # A linha do puzzle (S1, O1, S2) é jogada no próprio board da varredura, sem cópias;
+                # ao final os lances são desfeitos e o board volta à posição após o blunder
+                line_board = board
+                scan_stack_size = len(board.move_stack)
+
+                # a) Primeiro lance do solucionador (S1), a partir da posição após o blunder
+                # Análise de ambiguidade (melhor lance e alternativas viáveis)
+                candidates = ambiguity.find_alternatives(engine, line_board, solver_color, max_variants, depth=depths['solve'], game=game, prescreen_depth=depths['base'])
+                if candidates is None:
+                    puzzle_ok = False
+                    reason = "múltiplas soluções"
+                else:
+                    best_move = candidates["best"]
+                    alt_moves = candidates["alternatives"]
+                    node_s1 = node.add_main_variation(best_move)
+                    half_moves += 1
+                    for alt in alt_moves:
+                        node.add_variation(alt)
+
+                    # b) Resposta do oponente (O1)
+                    line_board.push(best_move)
+                    # A análise multipv de S1 já traz a resposta na PV do melhor lance; só analisa de novo se ela faltar
+                    opp_move = candidates["reply"]
+                    if opp_move is None:
+                        # Até dois lances legais bastam: nenhum encerra a linha, um só é resposta forçada (dispensa a análise)
+                        legal_replies = list(islice(line_board.generate_legal_moves(), 2))
+                        if len(legal_replies) == 1:
+                            opp_move = legal_replies[0]
+                        elif legal_replies:
+                            try:
+                                info_opp = cached_analyse(engine, line_board, depths['solve'], game=game)
+                            except Exception:
+                                info_opp = cached_analyse(engine, line_board, scan_depth, game=game)
+                            pv_line = info_opp.get("pv")
+                            # Sem PV do motor, usa o primeiro lance legal já gerado
+                            opp_move = pv_line[0] if pv_line else legal_replies[0]
+                    if opp_move is None:
+                        # S1 encerra a partida (mate ou afogamento): não há O1/S2 e a linha fica curta demais
+                        puzzle_ok = False
+                        reason = "sequência muito curta"
+                    else:
+                        node_o1 = node_s1.add_main_variation(opp_move)
+                        half_moves += 1
+
+                        # c) Segundo lance do solucionador (S2)
+                        line_board.push(opp_move)
+                        candidates2 = ambiguity.find_alternatives(engine, line_board, solver_color, max_variants, depth=depths['solve'], game=game, prescreen_depth=depths['base'])
+                        if candidates2 is None:
+                            puzzle_ok = False
+                            reason = "múltiplas soluções"
+                        else:
+                            best_move2 = candidates2["best"]
+                            alt_moves2 = candidates2["alternatives"]
+                            node_s2 = node_o1.add_main_variation(best_move2)
+                            half_moves += 1
+                            for alt2 in alt_moves2:
+                                node_o1.add_variation(alt2)
+                                # Possibilidade de extensão para S3, S4, etc.
+
+                            # Posição final da linha principal, mantida aqui para não reconstruí-la a partir da árvore PGN
+                            line_board.push(best_move2)
+                            final_board = line_board
+                            # Avaliação da análise de S2 (profundidade 'solve'), que já corresponde à posição final
+                            final_score = candidates2["score"]
+
+                # Filtro de comprimento mínimo da sequência
+                if puzzle_ok and half_moves < config.MIN_PUZZLE_HALF_MOVES:
+                    puzzle_ok = False
+                    reason = "sequência muito curta"
+
+                # Decisão final sobre o puzzle
+                if puzzle_ok:
+                    if final_board.is_checkmate():
+                        objective = "Mate"
+                    else:
+                        # S2 forçado (sem análise do motor): avalia a posição final numa profundidade rápida
+                        if final_score is None:
+                            final_score = cached_analyse(engine, final_board, quick_depth, game=game).get("score")
+                        # Mate a favor do solver conta como vantagem decisiva (e mate contra ele, como perda)
+                        final_cp = utils.score_to_cp(final_score, solver_color) if final_score else None
+                        final_win = (final_cp is not None and final_cp >= winning_advantage)
+                        final_draw = (final_cp is not None and -drawing_range < final_cp < drawing_range)
+                        if final_win:
+                            objective = "Reversão" if (prev_cp is not None and prev_cp < 0) else "Blunder"
+                        elif final_draw:
+                            objective = "Equalização" if (prev_cp is not None and prev_cp < 0) else "Defesa"
+                        else:
+                            objective = "Defesa"
+
+                    if fullmove_num <= 10:
+                        phase = "Abertura"
+                    elif fullmove_num >= 30 or piece_count <= 10:
+                        phase = "Final"
+                    else:
+                        phase = "Meio-jogo"
+
+                    puzzle_game.headers["Objetivo"] = objective
+                    puzzle_game.headers["Fase"] = phase
 
-def generate_puzzles(input_path, output_path=None, depth=config.DEFAULT_DEPTH, max_variants=config.DEFAULT_MAX_VARIANTS, verbose=False, resume=False):
+                    pgn_text = exporter.format_puzzle(puzzle_game)
+                    puzzles.append((pgn_text, objective, phase))
+                    if verbose:
+                        visual.print_verbose_puzzle_generated(progress, "[bold green]Puzzle gerado com sucesso.[/bold green]\n", pgn_text)
+                else:
+                    rejections.append(reason)
+                    if verbose and reason:
+                        progress.log(f"[bold red]Descartado:[/] [bold]{reason}.[/]\n")
+
+                while len(board.move_stack) > scan_stack_size:
+                    board.pop()
+        prev_score = score
+        prev_cp = post_cp
+        prev_prescan_cp = prescan_cp
+        prev_str = post_str
+
+    return puzzles, rejections
+
+def _init_worker(engine_path, threads, hash_mb):
+    # Inicia o Stockfish do processo trabalhador uma única vez, reutilizando-o em todos os jogos
+    global _worker_engine
+    _worker_engine = utils.start_stockfish(engine_path, threads=threads, hash_mb=hash_mb)
+    # Encerra o Stockfish quando o processo trabalhador terminar (a thread do motor impediria a saída)
+    multiprocessing.util.Finalize(None, _close_worker_engine, exitpriority=10)
+    # O Ctrl+C é tratado pelo processo principal; o Stockfish iniciado acima continua recebendo o sinal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _close_worker_engine():
+    # O motor pode já ter sido encerrado pelo Ctrl+C; nesse caso não há o que fechar
+    try:
+        _worker_engine.quit()
+    except Exception:
+        pass
+
+def _analyze_game_worker(game, depths, max_variants, verbose):
+    # Executado no processo trabalhador: analisa o jogo (MainlineGame) recebido do processo principal
+    output = visual.DeferredOutput()
+    puzzles, rejections = analyze_game(_worker_engine, game, depths, max_variants, output, verbose)
+    return puzzles, rejections, output
+
+def _analyze_in_process(games_iterator, engine, depths, max_variants, verbose, progress):
+    # Analisa os jogos sequencialmente com o motor do processo principal
+    for game, offset in games_iterator:
+        puzzles, rejections = analyze_game(engine, game, depths, max_variants, progress, verbose)
+        yield puzzles, rejections, None, offset
+
+def _analyze_in_workers(games_iterator, engine_path, depths, max_variants, verbose, workers, threads=None, hash_mb=None):
+    # Distribui os jogos entre processos trabalhadores e devolve os resultados na ordem do arquivo,
+    # mantendo no máximo 2 jogos pendentes por processo para não carregar o PGN inteiro na memória
+    if threads is None:
+        threads = config.WORKER_ENGINE_THREADS
+    # Sem valor explícito, a memória de hash é dividida entre os motores (sem passar do valor usado por um motor sozinho
+    # nem cair abaixo do padrão de 16 MB)
+    if hash_mb is None:
+        hash_mb = max(16, min(config.ENGINE_HASH_MB, config.ENGINE_HASH_BUDGET_MB // workers))
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(engine_path, threads, hash_mb))
+    pending = deque()
+    try:
+        for game, offset in games_iterator:
+            pending.append((executor.submit(_analyze_game_worker, game, depths, max_variants, verbose), offset))
+            if len(pending) >= workers * 2:
+                future, offset = pending.popleft()
+                yield (*future.result(), offset)
+        while pending:
+            future, offset = pending.popleft()
+            yield (*future.result(), offset)
+    finally:
+        for future, _ in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+def _save_progress(input_path, stats, offset, output_handle):
+    # Grava no disco os puzzles pendentes e só então registra o progresso, para o resume nunca pular puzzles
+    if output_handle and not output_handle.closed:
+        output_handle.flush()
+    resume_module.update_resume_data(input_path, stats.total_games, stats, puzzles_dir="puzzles", offset=offset)
+
+def generate_puzzles(input_path, output_path=None, depth=config.DEFAULT_DEPTH, max_variants=config.DEFAULT_MAX_VARIANTS, verbose=False, resume=False, workers=config.DEFAULT_WORKERS, engine_path=None, threads=None, hash_mb=None):
     """
     Analisa os jogos do arquivo PGN input_path e gera puzzles táticos conforme os critérios.
+    Com workers > 1, os jogos são distribuídos entre processos, cada um com seu próprio Stockfish.
+    threads e hash_mb configuram cada Stockfish; None mantém os valores padrão de src/config.py.
     """
     # Preparar saída (arquivo ou console) - Modo append se resume=True
-    output_handle = open(output_path, "a" if resume else "w", encoding="utf-8") if output_path else None
+    output_handle = open(output_path, "a" if resume else "w", encoding="utf-8", buffering=1 << 20) if output_path else None
     engine = None
     was_interrupted = False
+    unsaved_games = 0     # Jogos processados ainda não registrados no resume
+    last_offset = None    # Posição no PGN logo após o último jogo processado
+    last_save = time.monotonic()  # Momento do último salvamento do resume
 
     # Calcular profundidades de análise utilizando o config
     depths = config.calculate_depths(depth)
 
     try:
-        # Detecta o caminho do Stockfish (priorizando o binário local)
-        engine_path = utils.detect_stockfish_path()
+        # Detecta o caminho do Stockfish (priorizando o binário local), caso não tenha sido informado
+        if engine_path is None:
+            engine_path = utils.detect_stockfish_path()
         visual.print_stockfish_info(engine_path)
 
-        # Inicia o Stockfish usando a função do módulo utils
-        engine = utils.start_stockfish(engine_path)
+        # No modo sequencial o Stockfish roda no próprio processo; no paralelo, cada trabalhador inicia o seu
+        if workers <= 1:
+            engine = utils.start_stockfish(engine_path, threads=threads, hash_mb=hash_mb)
 
         # Inicializa os dados de resume (ou reseta caso não esteja usando --resume)
         resume_data, games_analyzed, stats = resume_module.initialize_resume(input_path, puzzles_dir="puzzles", resume_flag=resume)
@@ -46,229 +397,51 @@ def generate_puzzles(input_path, output_path=None, depth=config.DEFAULT_DEPTH, m
         file_size = utils.format_size(input_path)
         visual.print_initial_analysis_info(input_path, file_size, total_game_count, resume, games_analyzed, depth, depths, max_variants)
 
-        # Cria o iterador e avança os jogos já analisados, se --resume
-        games_iterator = utils.iterate_games(input_path)
-        if resume:
-            games_iterator = resume_module.skip_processed_games(games_iterator, games_analyzed)
+        # Cria o iterador e avança os jogos já analisados, se --resume: direto para a posição salva
+        # ou, em arquivos de resume sem posição, localizando o próximo jogo pelas linhas "[Event ".
+        # Sem jogos analisados a leitura começa do início do arquivo, mesmo que o primeiro jogo não comece por "[Event "
+        resume_offset = resume_data.get("offset") if resume else None
+        if resume and resume_offset is None and games_analyzed > 0:
+            resume_offset = utils.find_game_offset(input_path, games_analyzed)
+        games_iterator = utils.iterate_games(input_path, start_offset=resume_offset or 0)
 
         # Cria a barra de progresso com o tempo acumulado (caso --resume esteja ativo)
         with visual.create_progress(elapsed_offset=resume_data.get("elapsed_time", 0) if resume else 0) as progress:
             task_id = progress.add_task("[yellow]Analisando partidas...", total=total_game_count, completed=games_analyzed)
-            # Processa cada jogo para gerar puzzles
-            for game in games_iterator:
-
-                # Obter headers originais do jogo e criar a posição inicial
-                original_headers = game.headers.copy()
-                board = game.board()
-
-                # Avaliação inicial da posição com profundidade 'scan'
-                try:
-                    info = engine.analyse(board, limit=chess.engine.Limit(depth=depths['scan']))
-                except Exception as e:
-                    progress.log(f"[red]Erro ao analisar posição inicial do jogo {stats.total_games}: {e}[/red]")
-                    continue
-                prev_score = info.get("score")
-                prev_cp = prev_score.pov(chess.WHITE).score() if prev_score else None
-
-                # Itera pelos movimentos da linha principal
-                move_number = 0
-                for move in game.mainline_moves():
-                    move_number += 1
-                    side_to_move = "White" if board.turn == chess.WHITE else "Black"
-                    move_san = board.san(move)
-                    board.push(move)
-
-                    # Nova análise após o lance
-                    try:
-                        info = engine.analyse(board, limit=chess.engine.Limit(depth=depths['scan']))
-                    except Exception:
-                        info = engine.analyse(board, limit=chess.engine.Limit(depth=depths['quick']))
-                    score = info.get("score")
-                    post_cp = score.pov(chess.WHITE).score() if score else None
-
-                    # Log detalhado se verbose estiver ativo
-                    if verbose:
-                        prev_str = utils.format_eval(prev_score)
-                        post_str = utils.format_eval(score)
-                        move_index = board.fullmove_number
-                        log_prefix = f"{move_index}." if side_to_move == "White" else f"{move_index}..."
-                        eval_text = Text()
-                        eval_text.append(f"{log_prefix} {move_san}: eval ")
-                        eval_text.append(prev_str, style="blue")
-                        eval_text.append(" → ")
-                        if prev_cp is not None and post_cp is not None:
-                            diff = post_cp - prev_cp
-                            style = "red" if diff < 0 and abs(diff) > 50 else ("green" if diff > 0 and abs(diff) > 50 else "blue")
-                            eval_text.append(post_str, style=style)
-                        else:
-                            eval_text.append(post_str, style="blue")
-                        progress.log(eval_text)
-
-                    # Verifica queda de avaliação (potencial blunder)
-                    if prev_cp is not None and post_cp is not None:
-                        eval_diff = prev_cp - post_cp
-                        blunder = False
-                        solver_color = None
-                        if board.turn == chess.BLACK:  # Brancas jogaram e a avaliação caiu
-                            if eval_diff >= config.BLUNDER_THRESHOLD:
-                                blunder = True
-                                solver_color = chess.BLACK  # Pretas devem resolver
-                        else:  # Pretas jogaram e a avaliação caiu
-                            if eval_diff <= -config.BLUNDER_THRESHOLD:
-                                blunder = True
-                                solver_color = chess.WHITE  # Brancas devem resolver
-
-                        if blunder:
-                            # Candidato a puzzle detectado
-                            if verbose:
-                                diff = abs(post_cp - prev_cp)
-                                diff_pawn = diff / 100.0
-                                side = "Brancas" if solver_color == chess.WHITE else "Pretas"
-                                prev_str = utils.format_eval(prev_score)
-                                post_str = utils.format_eval(score)
-                                progress.log(f"[bold yellow]Candidato a puzzle detectado no lance {move_number}[/bold yellow]\n"
-                                             f"{side_to_move} cometeu erro: avaliação {prev_str} → {post_str}\n"
-                                             f"Diferença: {diff_pawn:.2f} peões")
-                            puzzle_ok = True
-                            reason = None
-
-                            # Filtro de vantagem prévia (não instrutivo) removido conforme nova estratégia
-                            # Prepara as posições para a geração do puzzle
-                            board_post_blunder = board.copy()    # Posição após o lance errado
-                            board_pre_blunder = board.copy()
-                            board_pre_blunder.pop()              # Volta para a posição anterior ao blunder
-
-                            # Cria o objeto PGN para o puzzle
-                            puzzle_game = chess.pgn.Game()
-                            # Copiar headers originais
-                            for tag, value in original_headers.items():
-                                puzzle_game.headers[tag] = value
-                            # Adicionar FEN da posição inicial do puzzle
-                            puzzle_game.headers["SetUp"] = "1"
-                            puzzle_game.headers["FEN"] = board_pre_blunder.fen()
-                            if "Result" in original_headers:
-                                puzzle_game.headers["Result"] = original_headers["Result"]
-
-                            # Monta a linha principal e as variações do puzzle
-                            node = puzzle_game
-                            # Adicionar lance de blunder do adversário como o primeiro lance do puzzle
-                            blunder_move = move
-                            node = node.add_main_variation(blunder_move)
-                            # Agora, node representa a posição após o blunder, e é a vez do solver jogar
-
-                            # a) Primeiro lance do solucionador (S1)
-                            solver_board = board_post_blunder.copy()
-                            # Análise de ambiguidade (melhor lance e alternativas viáveis)
-                            candidates = ambiguity.find_alternatives(engine, solver_board, solver_color, max_variants, depth=depths['solve'])
-                            if candidates is None:
-                                puzzle_ok = False
-                                reason = "múltiplas soluções"
-                            else:
-                                best_move = candidates["best"]
-                                alt_moves = candidates["alternatives"]
-                                node_s1 = node.add_main_variation(best_move)
-                                for alt in alt_moves:
-                                    node.add_variation(alt)
-
-                                # b) Resposta do oponente (O1)
-                                opponent_board = solver_board.copy()
-                                opponent_board.push(best_move)
-                                try:
-                                    info_opp = engine.analyse(opponent_board, limit=chess.engine.Limit(depth=depths['solve']))
-                                except Exception:
-                                    info_opp = engine.analyse(opponent_board, limit=chess.engine.Limit(depth=depths['scan']))
-                                opp_move = None
-                                if "pv" in info_opp:
-                                    pv_line = info_opp["pv"]
-                                    if pv_line:
-                                        opp_move = pv_line[0]
-                                if opp_move is None:
-                                    opp_move = list(opponent_board.legal_moves)[0]
-                                node_o1 = node_s1.add_main_variation(opp_move)
-
-                                # c) Segundo lance do solucionador (S2)
-                                solver_board2 = opponent_board.copy()
-                                solver_board2.push(opp_move)
-                                candidates2 = ambiguity.find_alternatives(engine, solver_board2, solver_color, max_variants, depth=depths['solve'])
-                                if candidates2 is None:
-                                    puzzle_ok = False
-                                    reason = "múltiplas soluções"
-                                else:
-                                    best_move2 = candidates2["best"]
-                                    alt_moves2 = candidates2["alternatives"]
-                                    node_s2 = node_o1.add_main_variation(best_move2)
-                                    for alt2 in alt_moves2:
-                                        node_o1.add_variation(alt2)
-                                        # Possibilidade de extensão para S3, S4, etc.
-
-                            # Filtro de comprimento mínimo da sequência
-                            if puzzle_ok:
-                                half_moves = 0
-                                node_iter = puzzle_game
-                                while node_iter.variations:
-                                    node_iter = node_iter.variations[0]
-                                    half_moves += 1
-                                if half_moves < 4:
-                                    puzzle_ok = False
-                                    reason = "sequência muito curta"
-
-                            # Decisão final sobre o puzzle
-                            if puzzle_ok:
-                                node_iter = puzzle_game
-                                while node_iter.variations:
-                                    node_iter = node_iter.variations[0]
-                                final_board = node_iter.board()
-                                if final_board.is_checkmate():
-                                    objective = "Mate"
-                                else:
-                                    final_info = engine.analyse(final_board, limit=chess.engine.Limit(depth=depths['quick']))
-                                    final_score = final_info.get("score")
-                                    final_cp = final_score.pov(solver_color).score() if final_score else None
-                                    final_win = (final_cp is not None and final_cp >= config.WINNING_ADVANTAGE)
-                                    final_draw = (final_cp is not None and -config.DRAWING_RANGE < final_cp < config.DRAWING_RANGE)
-                                    if final_win:
-                                        objective = "Reversão" if (prev_cp is not None and prev_cp < 0) else "Blunder"
-                                    elif final_draw:
-                                        objective = "Equalização" if (prev_cp is not None and prev_cp < 0) else "Defesa"
-                                    else:
-                                        objective = "Defesa"
-
-                                fullmove_num = board_pre_blunder.fullmove_number
-                                piece_count = sum(
-                                    1 for sq in chess.SQUARES
-                                    if board_pre_blunder.piece_at(sq) and board_pre_blunder.piece_at(sq).piece_type != chess.KING
-                                )
-                                if fullmove_num <= 10:
-                                    phase = "Abertura"
-                                elif fullmove_num >= 30 or piece_count <= 10:
-                                    phase = "Final"
-                                else:
-                                    phase = "Meio-jogo"
-
-                                puzzle_game.headers["Objetivo"] = objective
-                                puzzle_game.headers["Fase"] = phase
-
-                                stats.update_objective(objective)
-                                stats.update_phase(phase)
-                                stats.add_found()
-
-                                if output_handle:
-                                    exporter.export_puzzle(puzzle_game, output_handle)
-                                if not verbose:
-                                    visual.print_puzzle_found(progress, stats.puzzles_found, puzzle_game)
-                                else:
-                                    visual.print_verbose_puzzle_generated(progress, "[bold green]Puzzle gerado com sucesso.[/bold green]\n", puzzle_game)
-                            else:
-                                stats.add_rejected(reason)
-                                if verbose and reason:
-                                    progress.log(f"[bold red]Descartado:[/] [bold]{reason}.[/]\n")
-                    prev_score = score
-                    prev_cp = post_cp
+            if engine:
+                results = _analyze_in_process(games_iterator, engine, depths, max_variants, verbose, progress)
+            else:
+                results = _analyze_in_workers(games_iterator, engine_path, depths, max_variants, verbose, workers, threads, hash_mb)
+
+            # Processa o resultado de cada jogo na ordem do arquivo
+            for puzzles, rejections, output, offset in results:
+                # Exibe as mensagens registradas pelo processo trabalhador
+                if output:
+                    output.replay(progress)
+
+                for reason in rejections:
+                    stats.add_rejected(reason)
+
+                for pgn_text, objective, phase in puzzles:
+                    stats.update_objective(objective)
+                    stats.update_phase(phase)
+                    stats.add_found()
+
+                    if output_handle:
+                        exporter.export_puzzle(pgn_text, output_handle)
+                    if not verbose:
+                        visual.print_puzzle_found(progress, stats.puzzles_found, pgn_text)
 
                 # Atualiza o contador acumulado de jogos processados
                 stats.increment_games()
-                # Atualiza os dados de resume usando os valores acumulados
-                resume_module.update_resume_data(input_path, stats.total_games, stats, puzzles_dir="puzzles")
+                last_offset = offset
+                unsaved_games += 1
+
+                # Salva o resume a cada RESUME_SAVE_INTERVAL jogos ou RESUME_SAVE_SECONDS segundos (e ao final, no finally)
+                if unsaved_games >= config.RESUME_SAVE_INTERVAL or time.monotonic() - last_save >= config.RESUME_SAVE_SECONDS:
+                    _save_progress(input_path, stats, last_offset, output_handle)
+                    unsaved_games = 0
+                    last_save = time.monotonic()
 
                 progress.update(task_id,
                                 advance=1,
@@ -284,6 +457,9 @@ def generate_puzzles(input_path, output_path=None, depth=config.DEFAULT_DEPTH, m
             output_handle.close()
         raise  # Re-lança a exceção original
     finally:
+        # Registra o progresso dos jogos processados desde o último salvamento
+        if unsaved_games:
+            _save_progress(input_path, stats, last_offset, output_handle)
         # Limpeza de recursos
         if engine:
             engine.quit()
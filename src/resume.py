@@ -23,14 +23,19 @@ def load_resume(input_path, puzzles_dir="puzzles"):
 
 def save_resume(input_path, resume_data, puzzles_dir="puzzles"):
     # Salva os dados de resume no arquivo JSON
+    # Escreve em um arquivo temporário e o troca pelo definitivo com os.replace, que é atômico:
+    # uma interrupção no meio da escrita nunca deixa um resume truncado
     resume_path = get_resume_file(input_path, puzzles_dir)
-    with open(resume_path, "w", encoding="utf-8") as f:
+    temp_path = resume_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
         json.dump(resume_data, f, indent=4, ensure_ascii=False)
+    os.replace(temp_path, resume_path)
 
 def initialize_resume(input_path, puzzles_dir="puzzles", resume_flag=False):
     if not resume_flag:
         resume_data = {
             "games_analyzed": 0,
+            "offset": 0,
             "elapsed_time": 0,
             "stats": {
                 "total_games": 0,
@@ -54,10 +59,12 @@ def initialize_resume(input_path, puzzles_dir="puzzles", resume_flag=False):
     # Retorna os três valores: resume_data, games_analyzed e stats (estatísticas iniciadas ou carregadas)
     return resume_data, games_analyzed, stats
 
-def update_resume_data(input_path, game_count, stats, puzzles_dir="puzzles"):
+def update_resume_data(input_path, game_count, stats, puzzles_dir="puzzles", offset=None):
     # Atualiza o resume com os dados atuais de progresso e estatísticas, incluindo tempo decorrido
+    # offset é a posição no PGN logo após o último jogo processado (permite retomar com seek)
     resume_data = {
         "games_analyzed": game_count,
+        "offset": offset,
         "elapsed_time": time.time() - stats.start_time,
         "stats": {
             "total_games": stats.total_games,
@@ -69,9 +76,3 @@ def update_resume_data(input_path, game_count, stats, puzzles_dir="puzzles"):
         }
     }
     save_resume(input_path, resume_data, puzzles_dir)
-
-def skip_processed_games(games_iterator, games_analyzed):
-    # Pula os jogos já processados, retornando o iterador ajustado
-    for _ in range(games_analyzed):
-        next(games_iterator, None)
-    return games_iterator
@@ -1,41 +1,154 @@
 import chess.pgn
+import chess.engine
 import os
 import shutil
+from functools import lru_cache
+from src import config
 
-# Abre o arquivo PGN e gera um jogo por vez
-def iterate_games(input_path):
+# Jogo reduzido ao que a análise usa: headers e lances da linha principal (sem árvore de nós)
+# Leve para enviar aos processos trabalhadores, que o recebem sem precisar reinterpretar o PGN
+class MainlineGame:
+    __slots__ = ("headers", "moves", "errors")
+
+    def __init__(self, headers, moves, errors=None):
+        self.headers = headers
+        self.moves = moves
+        self.errors = errors if errors is not None else []  # Erros de leitura do PGN, como em chess.pgn.Game.errors
+
+    def board(self):
+        # Posição inicial do jogo (considera SetUp/FEN e variantes informados nos headers)
+        return self.headers.board()
+
+    def mainline_moves(self):
+        return self.moves
+
+# Visitor que lê um jogo como MainlineGame, sem criar nós, variantes, comentários ou NAGs
+class MainlineVisitor(chess.pgn.BaseVisitor):
+    def begin_game(self):
+        self.headers = chess.pgn.Headers()
+        self.moves = []
+        self.errors = []
+
+    def begin_headers(self):
+        return self.headers
+
+    def visit_header(self, tagname, tagvalue):
+        self.headers[tagname] = tagvalue
+
+    def begin_variation(self):
+        # Instrui o parser a pular a variante inteira sem validar lances
+        return chess.pgn.SKIP
+
+    def visit_move(self, board, move):
+        self.moves.append(move)
+
+    def handle_error(self, error):
+        # Assim como o GameBuilder, não interrompe a leitura (o jogo fica com os lances lidos até o erro),
+        # mas registra o erro no log do chess.pgn e no próprio jogo
+        chess.pgn.LOGGER.error("%s while parsing game %s x %s", error, self.headers.get("White", "?"), self.headers.get("Black", "?"))
+        self.errors.append(error)
+
+    def result(self):
+        return MainlineGame(self.headers, self.moves, self.errors)
+
+# Tamanho do buffer de leitura dos arquivos PGN (o padrão de 8 KB gera muitas chamadas de sistema em arquivos grandes)
+PGN_READ_BUFFER = 1 << 20
+
+# Marca de ordem de bytes (BOM) que alguns editores gravam no início de arquivos UTF-8
+UTF8_BOM = b"\xef\xbb\xbf"
+
+# Posiciona o arquivo binário logo após o BOM, se houver, para o primeiro "[Event " contar como início de linha
+def skip_bom(pgn_file):
+    if pgn_file.read(len(UTF8_BOM)) != UTF8_BOM:
+        pgn_file.seek(0)
+
+# Avisa o kernel que o arquivo será lido do início ao fim, para ele antecipar a leitura (readahead) em blocos maiores
+def advise_sequential(file_handle):
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(file_handle.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass  # Não suportado por este sistema de arquivos; é só uma dica
+
+# Abre o arquivo PGN e gera um jogo por vez, junto com a posição no arquivo logo após o jogo
+# (start_offset, uma posição gerada anteriormente, permite retomar a leitura sem reler o início do arquivo)
+def iterate_games(input_path, start_offset=0):
     try:
-        with open(input_path, "r", encoding="utf-8", errors="ignore") as pgn_file:
+        with open(input_path, "r", encoding="utf-8", errors="ignore", buffering=PGN_READ_BUFFER) as pgn_file:
+            advise_sequential(pgn_file)
+            if start_offset:
+                pgn_file.seek(start_offset)
             while True:
-                game = chess.pgn.read_game(pgn_file)
+                game = chess.pgn.read_game(pgn_file, Visitor=MainlineVisitor)
                 if game is None:
                     break
-                yield game
+                yield game, pgn_file.tell()
     except FileNotFoundError:
         raise
 
-# Conta o número de jogos no arquivo PGN utilizando iterate_games
+# Conta o número de jogos no arquivo PGN procurando as linhas "[Event " direto nos bytes, sem interpretar o PGN
 def count_games(input_path):
     total_game_count = 0
+    marker = b"\n[Event "
     try:
-        for _ in iterate_games(input_path):
-            total_game_count += 1
+        with open(input_path, "rb") as pgn_file:
+            advise_sequential(pgn_file)
+            skip_bom(pgn_file)
+            # O início do arquivo conta como início de linha; o final de cada bloco é mantido para não perder
+            # um marcador dividido entre dois blocos (o marcador não se sobrepõe, então nada é contado duas vezes)
+            tail = b"\n"
+            while True:
+                chunk = pgn_file.read(PGN_READ_BUFFER)
+                if not chunk:
+                    break
+                data = tail + chunk
+                total_game_count += data.count(marker)
+                tail = data[-(len(marker) - 1):]
     except Exception:
         total_game_count = 1
     return max(1, total_game_count)
 
+# Localiza, pelas linhas "[Event " e sem interpretar o PGN, a posição em bytes do início do jogo de índice game_index
+# (contando a partir de 0); se o arquivo tiver menos jogos, retorna a posição do final do arquivo
+def find_game_offset(input_path, game_index):
+    marker = b"\n[Event "
+    with open(input_path, "rb") as pgn_file:
+        advise_sequential(pgn_file)
+        skip_bom(pgn_file)
+        # Como em count_games, o início do arquivo (após o BOM) conta como início de linha: o "\n" inicial
+        # fica uma posição antes do primeiro byte lido
+        tail = b"\n"
+        data_start = pgn_file.tell() - 1  # Posição no arquivo do primeiro byte de data
+        games_seen = 0
+        while True:
+            chunk = pgn_file.read(PGN_READ_BUFFER)
+            if not chunk:
+                return pgn_file.tell()
+            data = tail + chunk
+            pos = data.find(marker)
+            while pos != -1:
+                if games_seen == game_index:
+                    return data_start + pos + 1  # Pula o "\n" do marcador
+                games_seen += 1
+                pos = data.find(marker, pos + len(marker))
+            tail = data[-(len(marker) - 1):]
+            data_start += len(data) - len(tail)
+
 # Formata a avaliação do engine para uma string legível
 def format_eval(score):
     if score is None:
         return "?"
-    try:
-        if score.is_mate():
-            mate = score.white().mate()
-            return f"M{abs(mate)}" if mate else "0"
-        cp = score.white().score()
-        return f"{cp / 100:.2f}"
-    except Exception:
-        return "?"
+    white_score = score.white()
+    mate = white_score.mate()
+    if mate is not None:
+        return f"M{abs(mate)}" if mate else "0"
+    cp = white_score.score()
+    return "?" if cp is None else f"{cp / 100:.2f}"
+
+# Converte uma avaliação (PovScore) em um único inteiro ordenável, em centipawns do ponto de vista de color.
+# Mate a favor vale perto de +MATE_SCORE (mates mais curtos valem mais) e mate contra, perto de -MATE_SCORE
+def score_to_cp(score, color):
+    return score.pov(color).score(mate_score=config.MATE_SCORE)
 
 # Retorna uma string com o tamanho do arquivo formatado
 def format_size(input_path: str) -> str:
@@ -51,6 +164,8 @@ def format_size(input_path: str) -> str:
         return "0.00 B"
 
 # Detecta o caminho do Stockfish usando o binário local ou o instalado no sistema
+# O resultado é memorizado; se nada for encontrado a exceção não é memorizada (após compilar, nova busca funciona)
+@lru_cache(maxsize=None)
 def detect_stockfish_path():
     local_stockfish = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "stockfish"))
     if os.path.isfile(local_stockfish):
@@ -60,12 +175,25 @@ def detect_stockfish_path():
     else:
         raise Exception("Nenhum executável do Stockfish foi encontrado. Compile ou instale o Stockfish.")
 
-# Inicia o Stockfish a partir do engine_path fornecido
-def start_stockfish(engine_path: str):
+# Inicia o Stockfish a partir do engine_path fornecido e aplica as opções configuradas (e o número de threads, se informado)
+# Só são enviadas as opções que o executável declara, já que versões e forks do Stockfish diferem na lista de opções
+def start_stockfish(engine_path: str, threads: int = None, hash_mb: int = None):
     try:
-        return chess.engine.SimpleEngine.popen_uci(engine_path)
+        engine = chess.engine.SimpleEngine.popen_uci(engine_path)
     except Exception as e:
         raise Exception(f"Não foi possível iniciar o Stockfish em '{engine_path}'. Erro: {e}")
+    options = {"Hash": hash_mb if hash_mb is not None else config.ENGINE_HASH_MB, "UCI_ShowWDL": False}
+    if threads is not None:
+        options["Threads"] = threads
+    options = {name: value for name, value in options.items() if name in engine.options}
+    if options:
+        try:
+            engine.configure(options)
+        except Exception:
+            # Valor recusado pelo motor: encerra o processo já iniciado, senão ele impediria a saída do programa
+            engine.quit()
+            raise
+    return engine
 
 # Determina o caminho de saída padrão ("<nome_do_arquivo>_puzzles.pgn) ou personalizado
 def get_default_output_path(input_path: str, output: str = None, puzzles_dir: str = "puzzles") -> str:
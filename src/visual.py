@@ -27,6 +27,25 @@ class CustomTimeElapsedColumn(TimeElapsedColumn):
         total_elapsed = (task.elapsed if task.elapsed is not None else 0) + self.elapsed_offset
         return Text(self._format_time(total_elapsed), style="green")
 
+# Registra mensagens de log/print para exibi-las depois (usado pelos processos trabalhadores)
+class DeferredOutput:
+    # Uma instância é criada por jogo e enviada de volta ao processo principal; sem __dict__ por instância
+    __slots__ = ("records",)
+
+    def __init__(self):
+        self.records = []
+
+    def log(self, *objects, **kwargs):
+        self.records.append(("log", objects, kwargs))
+
+    def print(self, *objects, **kwargs):
+        self.records.append(("print", objects, kwargs))
+
+    def replay(self, progress):
+        # Reproduz as mensagens registradas na barra de progresso do processo principal
+        for method, objects, kwargs in self.records:
+            getattr(progress, method)(*objects, **kwargs)
+
 # Cria e configura a barra de progresso
 def create_progress(elapsed_offset=0):
     progress = Progress(
@@ -60,25 +79,20 @@ def print_initial_analysis_info(input_path, file_size, total_games, resume=False
     if resume and games_analyzed > 0:
         console.print(f"Jogos analisados: [green]{games_analyzed}[/] ([cyan]{(games_analyzed/total_games)*100:.1f}%[/] concluído)")
     if depth is not None and depths is not None:
-        console.print(f"Profundidade de análise: {depth} (scan: [bold cyan]{depths['scan']}[/bold cyan], solve: [bold cyan]{depths['solve']}[/bold cyan])")
+        console.print(f"Profundidade de análise: {depth} (pré-varredura: [bold cyan]{depths['prescan']}[/bold cyan], scan: [bold cyan]{depths['scan']}[/bold cyan], solve: [bold cyan]{depths['solve']}[/bold cyan])")
     if max_variants is not None:
         console.print(f"Variantes máximas permitidas: [cyan]{max_variants}[/]\n")
 
-# Mostra o puzzle encontrado no modo não verbose
-def print_puzzle_found(progress, puzzles_found, puzzle_game):
+# Mostra o puzzle encontrado no modo não verbose (o texto PGN é impresso como está, sem interpretar markup)
+def print_puzzle_found(progress, puzzles_found, pgn_text):
     progress.print(f"[bold yellow]Puzzle #{puzzles_found} Encontrado[/bold yellow]")
-    pgn_text = str(puzzle_game)
-    parts = pgn_text.split("\n\n", 1)
-    if len(parts) == 2:
-        progress.print(f"{pgn_text}\n")
-    else:
-        progress.print(f"{pgn_text}\n")
-
-# Exibe mensagem detalhada em modo verbose
-def print_verbose_puzzle_generated(progress, message, puzzle_game=None):
+    progress.print(pgn_text + "\n", markup=False)
+
+# Exibe mensagem detalhada em modo verbose (o texto PGN, como em print_puzzle_found, é impresso sem interpretar markup)
+def print_verbose_puzzle_generated(progress, message, pgn_text=None):
     progress.log(message)
-    if puzzle_game:
-        progress.print(str(puzzle_game) + "\n")
+    if pgn_text:
+        progress.print(pgn_text + "\n", markup=False)
 
 # Estilo para erro
 def print_error(message):
@@ -99,6 +113,9 @@ def print_configurations(args):
     console.print(f"📤 Saída:           [cyan]{args.output}[/cyan]")
     console.print(f"🔍 Profundidade:    [cyan]{args.depth}[/cyan]")
     console.print(f"🌿 Variantes máx.:  [cyan]{args.max_variants}[/cyan]")
+    console.print(f"🧵 Processos:       [cyan]{args.workers}[/cyan]")
+    console.print(f"🧠 Threads:         [cyan]{args.threads if args.threads is not None else 'Padrão'}[/cyan]")
+    console.print(f"💾 Hash (MB):       [cyan]{args.hash if args.hash is not None else 'Padrão'}[/cyan]")
     console.print(f"🗣️  Verbose:         [cyan]{'Sim' if args.verbose else 'Não'}[/cyan]")
     console.print(f"⏯️  Retomar:         [cyan]{'Sim' if args.resume else 'Não'}[/cyan]\n")
 